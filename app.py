@@ -1,10 +1,19 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
-from datetime import datetime, timedelta
-import seaborn as sns
+import io
+import weakref
+from collections import defaultdict
+
+# Largest number of points shipped to the browser for a scatter plot
+MAX_SCATTER_POINTS = 5000
+
+# Categories shown individually in a pie chart; the rest are grouped as "Other"
+MAX_PIE_SLICES = 8
+
+# Bounds for per-dataset caches, so uploads from every session don't pile up in server memory
+CACHE_MAX_ENTRIES = 32
+CACHE_TTL_SECONDS = 3600
 
 # Page configuration
 st.set_page_config(
@@ -26,13 +35,6 @@ st.markdown("""
         -webkit-text-fill-color: transparent;
         margin-bottom: 2rem;
     }
-    .insight-box {
-        background-color: #f0f2f6;
-        padding: 1.5rem;
-        border-radius: 10px;
-        border-left: 4px solid #1e3c72;
-        margin: 1rem 0;
-    }
     .metric-card {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
         padding: 1rem;
@@ -50,46 +52,145 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
+def _fingerprint_memo():
+    """Fingerprints of live DataFrames, keyed by id() and validated with a weak reference
+
+    Held in cache_resource because Streamlit re-executes this module on every rerun,
+    which would reset a plain module-level dict.
+    """
+    return {}
+
+def _df_fingerprint(df):
+    """Cheap cache key for a DataFrame: shape, columns and a content hash
+
+    The content hash is computed once per frame object, so reruns on the frame held
+    in session state hash in O(1) instead of rescanning every cell.
+    """
+    memo = _fingerprint_memo()
+    key = id(df)
+    entry = memo.get(key)
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    
+    fingerprint = (df.shape, tuple(df.columns), int(pd.util.hash_pandas_object(df, index=False).sum()))
+    memo[key] = (weakref.ref(df, lambda _, key=key: memo.pop(key, None)), fingerprint)
+    return fingerprint
+
+def _escape_markdown(text):
+    """Escape $ so dollar amounts in insight text aren't rendered as inline LaTeX"""
+    return text.replace('$', '\\$')
+
+def _bucket_columns(columns):
+    """Group column names by the business keyword they match, in a single pass"""
+    buckets = defaultdict(list)
+    for col in columns:
+        name = str(col).lower()
+        if 'revenue' in name or 'sales' in name:
+            buckets['revenue'].append(col)
+        if 'stock' in name or 'inventory' in name:
+            buckets['stock'].append(col)
+        if 'lead' in name and 'time' in name:
+            buckets['lead_time'].append(col)
+        if 'cost' in name or 'price' in name:
+            buckets['cost'].append(col)
+        if any(keyword in name for keyword in ['product', 'category', 'type', 'sku']):
+            buckets['category'].append(col)
+    return buckets
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS,
+               hash_funcs={pd.DataFrame: _df_fingerprint})
 def calculate_data_quality(df):
     """Calculate data quality percentage"""
-    total_cells = df.shape[0] * df.shape[1]
-    missing_cells = df.isnull().sum().sum()
-    quality = ((total_cells - missing_cells) / total_cells) * 100
+    total_cells = df.size
+    if total_cells == 0:
+        return 100.0
+    # df.count() tallies non-null cells per column without building a boolean frame
+    non_null_cells = int(df.count().sum())
+    quality = (non_null_cells / total_cells) * 100
     return quality
 
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def load_csv(file_bytes, name):
+    """Parse an uploaded CSV; cached on the file contents so reruns skip the parse"""
+    try:
+        # Arrow's multi-threaded reader is much faster on large files. The default numpy
+        # dtype backend is kept: Arrow-backed text would come back as string[pyarrow], which
+        # the object/category selectors here and in split_column_types don't match
+        df = pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow')
+    except Exception:
+        # Fall back to the default parser for files pyarrow can't handle
+        df = pd.read_csv(io.BytesIO(file_bytes))
+    
+    # Narrow integer columns to the smallest dtype that fits, cutting bytes per scan
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    
+    # Repeated text values become categoricals so groupbys hash small integer codes
+    for col in df.select_dtypes(include=['object']).columns:
+        if df[col].nunique() < len(df) * 0.5:
+            df[col] = df[col].astype('category')
+    
+    return df
+
+@st.cache_data(show_spinner=False)
 def generate_sample_data():
     """Generate sample supply chain data for demo"""
-    np.random.seed(42)
-    dates = pd.date_range(start='2023-01-01', end='2024-12-31', freq='D')
+    n = 1000
+    rng = np.random.default_rng(42)
+    dates = np.arange(np.datetime64('2023-01-01'), np.datetime64('2025-01-01'), dtype='datetime64[D]')
     
     # Sample inventory data
     products = ['Product A', 'Product B', 'Product C', 'Product D', 'Product E']
     warehouses = ['Warehouse 1', 'Warehouse 2', 'Warehouse 3']
     
-    data = []
-    for _ in range(1000):
-        data.append({
-            'Date': np.random.choice(dates),
-            'Product': np.random.choice(products),
-            'Warehouse': np.random.choice(warehouses),
-            'Stock_Quantity': np.random.randint(0, 1000),
-            'Demand': np.random.randint(10, 200),
-            'Cost_Per_Unit': round(np.random.uniform(5, 50), 2),
-            'Supplier_Lead_Time': np.random.randint(1, 30),
-            'Order_Quantity': np.random.randint(50, 500)
-        })
-    
-    return pd.DataFrame(data)
+    # Draw each column in one vectorized call instead of row by row; the arrays are
+    # freshly allocated, so the frame can adopt them without a defensive copy
+    return pd.DataFrame({
+        'Date': dates[rng.integers(0, dates.size, n)],
+        'Product': pd.Categorical.from_codes(rng.integers(0, len(products), n, dtype=np.int8), categories=products),
+        'Warehouse': pd.Categorical.from_codes(rng.integers(0, len(warehouses), n, dtype=np.int8), categories=warehouses),
+        'Stock_Quantity': rng.integers(0, 1000, n, dtype=np.int32),
+        'Demand': rng.integers(10, 200, n, dtype=np.int32),
+        'Cost_Per_Unit': np.round(rng.uniform(5, 50, n), 2),
+        'Supplier_Lead_Time': rng.integers(1, 30, n, dtype=np.int32),
+        'Order_Quantity': rng.integers(50, 500, n, dtype=np.int32)
+    }, copy=False)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS,
+               hash_funcs={pd.DataFrame: _df_fingerprint})
+def split_column_types(df):
+    """Numeric and categorical column names, resolved once per dataset"""
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    return numeric_cols, categorical_cols
 
-def analyze_data(df, user_type):
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS,
+               hash_funcs={pd.DataFrame: _df_fingerprint})
+def describe_data(df, numeric_cols):
+    """Summary statistics table, cached so per-column quantiles run once per dataset"""
+    if numeric_cols:
+        # Numeric columns only; unlike the default, datetime columns such as Date are left out
+        return df.describe(include=[np.number])
+    # Text-only data still gets count/unique/top/freq
+    return df.describe()
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS,
+               hash_funcs={pd.DataFrame: _df_fingerprint})
+def analyze_data(df, user_type, numeric_cols, categorical_cols):
     """Generate business-friendly insights for supply chain data"""
     insights = []
     
+    # Every insight aggregates a numeric column, so skip the pipeline when there is nothing to aggregate
+    if len(df) == 0 or not numeric_cols:
+        return insights
+    
     try:
         # Business Performance Analysis
+        buckets = _bucket_columns(df.columns)
         
         # Revenue Analysis (if revenue column exists)
-        revenue_cols = [col for col in df.columns if 'revenue' in col.lower() or 'sales' in col.lower()]
+        revenue_cols = buckets['revenue']
         if revenue_cols:
             revenue_col = revenue_cols[0]
             total_revenue = df[revenue_col].sum()
@@ -103,20 +204,13 @@ def analyze_data(df, user_type):
             })
         
         # Best/Worst Performing Categories
-        categorical_cols = df.select_dtypes(include=['object']).columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        
-        if len(categorical_cols) > 0 and len(numeric_cols) > 0:
+        if len(categorical_cols) > 0:
             # Find product type or category column
-            category_col = None
-            for col in categorical_cols:
-                if any(keyword in col.lower() for keyword in ['product', 'category', 'type', 'sku']):
-                    category_col = col
-                    break
+            category_col = next((col for col in buckets['category'] if col in categorical_cols), None)
             
             if category_col and revenue_cols:
                 # Best and worst performing categories by revenue
-                category_performance = df.groupby(category_col)[revenue_cols[0]].sum().sort_values(ascending=False)
+                category_performance = df.groupby(category_col, observed=True)[revenue_cols[0]].sum().sort_values(ascending=False)
                 
                 best_category = category_performance.index[0]
                 worst_category = category_performance.index[-1]
@@ -138,11 +232,12 @@ def analyze_data(df, user_type):
                 })
         
         # Stock Level Analysis
-        stock_cols = [col for col in df.columns if 'stock' in col.lower() or 'inventory' in col.lower()]
+        stock_cols = buckets['stock']
         if stock_cols:
             stock_col = stock_cols[0]
-            low_stock_threshold = df[stock_col].quantile(0.25)
-            low_stock_items = len(df[df[stock_col] <= low_stock_threshold])
+            stock = df[stock_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            low_stock_threshold = np.nanquantile(stock, 0.25)
+            low_stock_items = np.count_nonzero(stock <= low_stock_threshold)
             
             insights.append({
                 'title': '📦 Inventory Alert',
@@ -152,11 +247,12 @@ def analyze_data(df, user_type):
             })
         
         # Lead Time Analysis
-        lead_time_cols = [col for col in df.columns if 'lead' in col.lower() and 'time' in col.lower()]
+        lead_time_cols = buckets['lead_time']
         if lead_time_cols:
             lead_col = lead_time_cols[0]
-            avg_lead_time = df[lead_col].mean()
-            long_lead_items = len(df[df[lead_col] > avg_lead_time * 1.5])
+            lead_times = df[lead_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            avg_lead_time = np.nanmean(lead_times)
+            long_lead_items = np.count_nonzero(lead_times > avg_lead_time * 1.5)
             
             insights.append({
                 'title': '⏰ Lead Time Optimization',
@@ -166,11 +262,12 @@ def analyze_data(df, user_type):
             })
         
         # Cost Analysis
-        cost_cols = [col for col in df.columns if 'cost' in col.lower() or 'price' in col.lower()]
+        cost_cols = buckets['cost']
         if cost_cols:
             cost_col = cost_cols[0]
-            high_cost_threshold = df[cost_col].quantile(0.75)
-            high_cost_items = len(df[df[cost_col] >= high_cost_threshold])
+            costs = df[cost_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            high_cost_threshold = np.nanquantile(costs, 0.75)
+            high_cost_items = np.count_nonzero(costs >= high_cost_threshold)
             
             insights.append({
                 'title': '💸 Cost Management Opportunity',
@@ -189,36 +286,52 @@ def analyze_data(df, user_type):
     
     return insights
 
-def create_visualizations(df):
-    """Create business-friendly visualizations for supply chain data"""
+# Figures are kept as live objects (no pickling round-trip); they are never mutated after creation
+@st.cache_resource(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS,
+                   hash_funcs={pd.DataFrame: _df_fingerprint})
+def create_visualizations(df, numeric_cols):
+    """Create business-friendly visualizations for supply chain data
+    
+    Returns Plotly figures, plus a dict spec for the unranked bar chart drawn with st.bar_chart
+    """
+    # Imported here so plotly only loads once there is data to chart
+    import plotly.express as px
+    
     charts = []
     
     try:
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        # Lowercase column names once and reuse them for every keyword lookup
+        columns = list(df.columns)
+        lowered = [str(col).lower() for col in columns]
+        
+        def find_columns(*keywords):
+            return [col for col, name in zip(columns, lowered) if any(keyword in name for keyword in keywords)]
         
         # Chart 1: Revenue by Product Type (Bar Chart)
-        revenue_cols = [col for col in df.columns if 'revenue' in col.lower()]
-        product_cols = [col for col in df.columns if 'product' in col.lower() or 'type' in col.lower()]
+        revenue_cols = find_columns('revenue')
+        product_cols = find_columns('product', 'type')
         
+        revenue_by_product = None
         if revenue_cols and product_cols:
-            revenue_by_product = df.groupby(product_cols[0])[revenue_cols[0]].sum().sort_values(ascending=False)
+            # One groupby feeds both this chart and the top 10 chart below
+            revenue_by_product = df.groupby(product_cols[0], observed=True)[revenue_cols[0]].sum()
             
-            fig1 = px.bar(
-                x=revenue_by_product.index,
-                y=revenue_by_product.values,
-                title='💰 Revenue Performance by Product Category',
-                labels={'x': 'Product Category', 'y': 'Total Revenue ($)'},
-                color=revenue_by_product.values,
-                color_continuous_scale='Blues'
-            )
-            fig1.update_layout(height=400, showlegend=False)
-            charts.append(fig1)
+            # Simple bars go to Streamlit's native chart, which ships a much lighter spec than Plotly;
+            # it orders bars by category and takes its axis titles from the index and series names
+            charts.append({
+                'title': '💰 Revenue Performance by Product Category',
+                'data': revenue_by_product.rename_axis('Product Category').rename('Total Revenue ($)'),
+                'height': 400
+            })
         
         # Chart 2: Stock Levels Distribution (Pie Chart)
-        stock_cols = [col for col in df.columns if 'stock' in col.lower()]
+        stock_cols = find_columns('stock')
         if stock_cols and product_cols:
-            stock_by_product = df.groupby(product_cols[0])[stock_cols[0]].sum()
+            stock_by_product = df.groupby(product_cols[0], observed=True)[stock_cols[0]].sum()
+            if len(stock_by_product) > MAX_PIE_SLICES:
+                top_stock = stock_by_product.nlargest(MAX_PIE_SLICES)
+                other_stock = stock_by_product.drop(top_stock.index).sum()
+                stock_by_product = pd.concat([top_stock, pd.Series({'Other': other_stock})])
             
             fig2 = px.pie(
                 values=stock_by_product.values,
@@ -230,10 +343,12 @@ def create_visualizations(df):
             charts.append(fig2)
         
         # Chart 3: Lead Time vs Revenue (Scatter Plot)
-        lead_time_cols = [col for col in df.columns if 'lead' in col.lower() and 'time' in col.lower()]
+        lead_time_cols = [col for col, name in zip(columns, lowered) if 'lead' in name and 'time' in name]
         if lead_time_cols and revenue_cols:
+            # Plotly serializes every point, so sample large frames down first
+            scatter_df = df.sample(MAX_SCATTER_POINTS, random_state=0) if len(df) > MAX_SCATTER_POINTS else df
             fig3 = px.scatter(
-                df,
+                scatter_df,
                 x=lead_time_cols[0],
                 y=revenue_cols[0],
                 title='⏰ Lead Time Impact on Revenue',
@@ -246,34 +361,38 @@ def create_visualizations(df):
             charts.append(fig3)
         
         # Chart 4: Top 10 Products by Revenue (Horizontal Bar)
-        if revenue_cols and product_cols:
-            if len(df[product_cols[0]].unique()) > 10:
-                top_products = df.groupby(product_cols[0])[revenue_cols[0]].sum().nlargest(10)
-                
-                fig4 = px.bar(
-                    x=top_products.values,
-                    y=top_products.index,
-                    orientation='h',
-                    title='🎯 Top 10 Revenue-Generating Products',
-                    labels={'x': 'Revenue ($)', 'y': 'Product'},
-                    color=top_products.values,
-                    color_continuous_scale='RdYlBu'
-                )
-                fig4.update_layout(height=500, showlegend=False)
-                charts.append(fig4)
+        if revenue_by_product is not None and len(revenue_by_product) > 10:
+            # nlargest selects the top 10 without sorting every product; the ranking
+            # matters here, so this chart stays on Plotly which keeps the given order
+            top_products = revenue_by_product.nlargest(10)
+            
+            fig4 = px.bar(
+                x=top_products.values,
+                y=top_products.index,
+                orientation='h',
+                title='🎯 Top 10 Revenue-Generating Products',
+                labels={'x': 'Revenue ($)', 'y': 'Product'},
+                color=top_products.values,
+                color_continuous_scale='RdYlBu'
+            )
+            fig4.update_layout(height=500, showlegend=False)
+            charts.append(fig4)
         
         # Fallback: Simple price distribution if above don't work
         if not charts and len(numeric_cols) > 0:
-            price_cols = [col for col in df.columns if 'price' in col.lower() or 'cost' in col.lower()]
+            price_cols = [col for col in find_columns('price', 'cost') if col in numeric_cols]
             if price_cols:
-                fig_fallback = px.histogram(
-                    df, 
-                    x=price_cols[0], 
+                # Bin server-side so the browser receives 20 bars instead of every row
+                prices = df[price_cols[0]].to_numpy(dtype=np.float64, na_value=np.nan)
+                counts, edges = np.histogram(prices[~np.isnan(prices)], bins=20)
+                fig_fallback = px.bar(
+                    x=(edges[:-1] + edges[1:]) / 2,
+                    y=counts,
                     title=f'💵 {price_cols[0]} Distribution',
-                    color_discrete_sequence=['#1e3c72'],
-                    nbins=20
+                    labels={'x': price_cols[0], 'y': 'count'},
+                    color_discrete_sequence=['#1e3c72']
                 )
-                fig_fallback.update_layout(height=400)
+                fig_fallback.update_layout(height=400, bargap=0)
                 charts.append(fig_fallback)
     
     except Exception as e:
@@ -288,6 +407,41 @@ def create_visualizations(df):
     
     return charts
 
+def render_insights(df, user_type, numeric_cols, categorical_cols):
+    """Render the insight cards for the current dataset and role"""
+    with st.spinner("🔍 Analyzing your data for patterns and insights..."):
+        insights = analyze_data(df, user_type, numeric_cols, categorical_cols)
+        
+        if insights:
+            # All cards go out as a single markdown element rather than several per insight
+            cards = [
+                f"#### 💡 {_escape_markdown(insight['title'])}\n\n"
+                f"**Finding:** {_escape_markdown(insight['description'])}\n\n"
+                f"**Recommendation:** {_escape_markdown(insight['recommendation'])}"
+                for insight in insights
+            ]
+            with st.container(border=True):
+                st.markdown("\n\n---\n\n".join(cards))
+        else:
+            st.info("📈 Upload more data for detailed insights!")
+
+def render_charts(df, numeric_cols):
+    """Render one tab per chart for the current dataset"""
+    charts = create_visualizations(df, numeric_cols)
+    
+    if charts:
+        # One tab per chart, labelled with the chart title, instead of a long stack of figures
+        titles = [chart['title'] if isinstance(chart, dict) else chart.layout.title.text for chart in charts]
+        tabs = st.tabs([title or f'Chart {i + 1}' for i, title in enumerate(titles)])
+        for tab, chart in zip(tabs, charts):
+            with tab:
+                if isinstance(chart, dict):
+                    # Native bar chart spec built by create_visualizations
+                    st.markdown(f"**{chart['title']}**")
+                    st.bar_chart(chart['data'], height=chart['height'], use_container_width=True)
+                else:
+                    st.plotly_chart(chart, use_container_width=True)
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">🚀 SupplyWise</h1>', unsafe_allow_html=True)
@@ -325,9 +479,20 @@ def main():
     df = None
     
     # Check for uploaded file or demo data
+    if uploaded_file is None:
+        # Drop the parsed upload once the uploader is cleared
+        st.session_state.pop('csv_df', None)
+        st.session_state.pop('csv_key', None)
+    
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
+            # Keep the parsed frame in session state until a different file is uploaded;
+            # file_id is unique per upload, so re-uploading an edited file is always re-parsed
+            csv_key = uploaded_file.file_id
+            if st.session_state.get('csv_key') != csv_key:
+                st.session_state.csv_df = load_csv(uploaded_file.getvalue(), uploaded_file.name)
+                st.session_state.csv_key = csv_key
+            df = st.session_state.csv_df
             st.success(f"✅ Successfully loaded your data: {len(df)} rows!")
         except Exception as e:
             st.error(f"❌ Error reading file: {str(e)}")
@@ -338,6 +503,9 @@ def main():
         st.info("🎮 Using demo data - upload your own file to analyze real data!")
     
     if df is not None:
+        # Column types are resolved once per dataset and shared with every section
+        numeric_cols, categorical_cols = split_column_types(df)
+        
         # Data overview
         st.markdown("### 👀 Data Overview")
         
@@ -350,41 +518,24 @@ def main():
             quality = calculate_data_quality(df)
             st.metric("✅ Data Quality", f"{quality:.1f}%")
         with col4:
-            numeric_cols = df.select_dtypes(include=['number']).columns
             st.metric("🔢 Numeric Fields", len(numeric_cols))
         
         # Data preview
         with st.expander("🔍 View Data Sample", expanded=False):
-            st.dataframe(df.head(10), use_container_width=True)
+            st.dataframe(df.head(10), hide_index=True, use_container_width=True)
         
         # Generate insights
         st.markdown("### 🧠 AI-Powered Insights")
         
-        with st.spinner("🔍 Analyzing your data for patterns and insights..."):
-            insights = analyze_data(df, user_type)
-            
-            if insights:
-                for i, insight in enumerate(insights):
-                    st.markdown(f"""
-                    <div class="insight-box">
-                        <h4>💡 {insight['title']}</h4>
-                        <p><strong>Finding:</strong> {insight['description']}</p>
-                        <p><strong>Recommendation:</strong> {insight['recommendation']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                st.info("📈 Upload more data for detailed insights!")
+        render_insights(df, user_type, numeric_cols, categorical_cols)
         
         # Visualizations
         st.markdown("### 📊 Smart Visualizations")
-        charts = create_visualizations(df)
-        
-        for i, chart in enumerate(charts):
-            st.plotly_chart(chart, use_container_width=True)
+        render_charts(df, numeric_cols)
             
         # Data summary
-        st.markdown("### 📋 Data Summary")
-        st.dataframe(df.describe(), use_container_width=True)
+        with st.expander("📋 Data Summary", expanded=False):
+            st.dataframe(describe_data(df, numeric_cols), use_container_width=True)
         
     else:
         # Welcome screen